@@ -6,6 +6,8 @@
 """A module to provide a high level interface for HTTP requests."""
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from common.string_util import StringUtil
 
@@ -13,13 +15,39 @@ from common.string_util import StringUtil
 class HttpRequester:
     """
     A class that contains high level methods to carry out HTTP calls. It supports TLS and
-    setup authorization credentials in the form of a token.
+    setup authorization credentials in the form of a token. All the calls are carried out over
+    a single HTTP session, so that TCP/TLS connections are kept alive and reused.
     """
 
+    CONNECTION_POOL_SIZE = 16
+    MAX_RETRIES = 3
+    RETRY_BACKOFF_FACTOR = 0.2
+
     def __init__(self, base_url, api_token=None, verify_cert=True):
         self._base_url = base_url
         self._verify_cert = verify_cert
         self._headers = {"Authorization": f"Token {api_token}"} if api_token else {}
+        self._session = self._create_session()
+
+    @classmethod
+    def _create_session(cls):
+        # NOTE: by default, urllib3 retries only idempotent methods (e.g. GET, DELETE), so a POST
+        # or a PATCH is never submitted twice. Once the retries are exhausted, the last response
+        # is returned as is, so that the callers keep handling it by its status code.
+        retry = Retry(
+            total=cls.MAX_RETRIES,
+            backoff_factor=cls.RETRY_BACKOFF_FACTOR,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=cls.CONNECTION_POOL_SIZE,
+            pool_maxsize=cls.CONNECTION_POOL_SIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     @property
     def webserver_api_path(self):
@@ -52,7 +80,9 @@ class HttpRequester:
         """
 
         url = endpoint_sub_url if raw else self._url(endpoint_sub_url)
-        return requests.get(url, headers=self._headers.copy(), verify=self._verify_cert, **kwargs)
+        return self._session.get(
+            url, headers=self._headers.copy(), verify=self._verify_cert, **kwargs
+        )
 
     def post(self, endpoint_sub_url, data=None, json=None, headers=None):
         """
@@ -80,7 +110,7 @@ class HttpRequester:
             request_headers.update(headers)
 
         url = self._url(endpoint_sub_url)
-        return requests.post(
+        return self._session.post(
             url, data=data, json=json, headers=request_headers, verify=self._verify_cert
         )
 
@@ -110,7 +140,7 @@ class HttpRequester:
             request_headers.update(headers)
 
         url = self._url(endpoint_sub_url)
-        return requests.patch(
+        return self._session.patch(
             url, data=data, json=json, headers=request_headers, verify=self._verify_cert
         )
 
@@ -130,4 +160,4 @@ class HttpRequester:
         """
 
         url = self._url(endpoint_sub_url)
-        return requests.delete(url, headers=self._headers.copy(), verify=self._verify_cert)
+        return self._session.delete(url, headers=self._headers.copy(), verify=self._verify_cert)
@@ -748,8 +748,9 @@ class ModelController(ControllerBase):
 
     def _actually_delete_models(self, missing_locally_id_to_git_id, deployments):
         logger.info("Deleting models ...")
+        deployed_model_ids = {deployment["customModel"]["id"] for deployment in deployments}
         for model_id, user_provided_id in missing_locally_id_to_git_id.items():
-            if any(model_id == deployment["customModel"]["id"] for deployment in deployments):
+            if model_id in deployed_model_ids:
                 logger.warning(
                     "Skipping model deletion because it is deployed. user_provided_id: %s, "
                     "model_id: %s",
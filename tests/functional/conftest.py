@@ -9,15 +9,16 @@
 """A functional test configuration module."""
 
 import contextlib
-import copy
 import logging
 import os
 import re
 import shutil
+import sys
 from collections import namedtuple
 from functools import lru_cache
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 import pytest
 import yaml
@@ -25,7 +26,6 @@ from git import Repo
 
 from common.convertors import MemoryConvertor
 from common.exceptions import DataRobotClientError
-from common.exceptions import IllegalModelDeletion
 from dr_client import DrClient
 from main import main
 from schema_validator import DeploymentSchema
@@ -33,10 +33,25 @@ from schema_validator import ModelSchema
 from schema_validator import SharedSchema
 from tests.conftest import unique_str
 
+try:
+    # Prefer the libyaml bindings, which are much faster than the pure Python implementation
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper
+    from yaml import SafeLoader
+
 
 @lru_cache
 def webserver_accessible():
-    """Check if DataRobot web server is accessible."""
+    """
+    Check if DataRobot web server is accessible. The result is cached, so the web server is probed
+    at most once per process. The probe can be skipped altogether by setting the
+    'DATAROBOT_WEBSERVER_ASSUME_ACCESSIBLE' environment variable to '1'.
+    """
+
+    if os.environ.get("DATAROBOT_WEBSERVER_ASSUME_ACCESSIBLE") == "1":
+        return True
 
     webserver = os.environ.get("DATAROBOT_WEBSERVER")
     api_token = os.environ.get("DATAROBOT_API_TOKEN")
@@ -67,26 +82,32 @@ def setup_clean_datarobot_environment():
 
 
 def cleanup_models(dr_client_tool, workspace_path):
-    """Delete models in DataRobot, which are defined in the local repository source tree."""
+    """
+    Delete models in DataRobot, which are defined in the local repository source tree. The custom
+    models are fetched only once, rather than once per deleted model.
+    """
 
     custom_models = dr_client_tool.fetch_custom_models()
     if custom_models:
         models_metadata = []
         for model_yaml_file in workspace_path.rglob("**/model.yaml"):
             with open(model_yaml_file, encoding="utf-8") as fd:
-                models_metadata.append(yaml.safe_load(fd))
+                models_metadata.append(yaml.load(fd, Loader=SafeLoader))
         for model_yaml_file in workspace_path.rglob("**/models.yaml"):
             with open(model_yaml_file, encoding="utf-8") as fd:
-                multi_models_metadata = yaml.safe_load(fd)
+                multi_models_metadata = yaml.load(fd, Loader=SafeLoader)
                 for model_entry in multi_models_metadata[ModelSchema.MULTI_MODELS_KEY]:
                     models_metadata.append(model_entry[ModelSchema.MODEL_ENTRY_META_KEY])
 
-        for model_metadata in models_metadata:
+        local_user_provided_ids = {
+            model_metadata[ModelSchema.MODEL_ID_KEY] for model_metadata in models_metadata
+        }
+        for custom_model in custom_models:
+            if custom_model.get("userProvidedId") not in local_user_provided_ids:
+                continue
             try:
-                dr_client_tool.delete_custom_model_by_user_provided_id(
-                    model_metadata[ModelSchema.MODEL_ID_KEY]
-                )
-            except (IllegalModelDeletion, DataRobotClientError):
+                dr_client_tool.delete_custom_model_by_model_id(custom_model["id"])
+            except DataRobotClientError:
                 pass
 
 
@@ -124,33 +145,31 @@ def printout(msg):
     print(msg)
 
 
-@contextlib.contextmanager
-def github_env_set(env_key, env_value):
+@lru_cache
+def ram_disk_temp_root():
     """
-    Set environment variable to simulate GitHub actions environment.
-
-    Parameters
-    ----------
-    env_key : str
-        Environment variable key.
-    env_value : str
-        Environment variable value.
+    Return a RAM backed (tmpfs) directory to create temporary source trees in, or None to use the
+    default temporary directory. The tests make many small writes and git commits, which are
+    considerably faster on a RAM disk.
     """
 
-    does_exist = env_key in os.environ
-    if does_exist:
-        old_value = os.environ[env_key]
-    os.environ[env_key] = env_value
-    yield
-    if does_exist:
-        os.environ[env_key] = old_value
+    shm_dir = "/dev/shm"
+    min_free_space_bytes = 256 * 1024 * 1024
+    if (
+        sys.platform.startswith("linux")
+        and os.path.isdir(shm_dir)
+        and os.access(shm_dir, os.W_OK)
+        and shutil.disk_usage(shm_dir).free > min_free_space_bytes
+    ):
+        return shm_dir
+    return None
 
 
 @pytest.fixture(name="workspace_path")
 def fixture_workspace_path():
     """A fixture to create and return a temporary root dir to create a repository in it."""
 
-    with TemporaryDirectory() as repo_tree:
+    with TemporaryDirectory(dir=ram_disk_temp_root()) as repo_tree:
         path = Path(repo_tree)
         yield path
 
@@ -192,7 +211,7 @@ def fixture_build_repo_for_testing_factory(
 
         model_metadata_yaml_filepath = next(dst_model_dir_path.rglob("**/model.yaml"))
         with open(model_metadata_yaml_filepath, encoding="utf-8") as reader:
-            model_metadata = yaml.safe_load(reader)
+            model_metadata = yaml.load(reader, Loader=SafeLoader)
 
         # Set model ID
         unique_string = unique_str()
@@ -218,7 +237,7 @@ def fixture_build_repo_for_testing_factory(
 
         if dedicated_definition:
             with open(model_metadata_yaml_filepath, "w", encoding="utf-8") as writer:
-                yaml.safe_dump(model_metadata, writer)
+                yaml.dump(model_metadata, writer, Dumper=SafeDumper)
         else:
             # The definition will be written in a single multi-models definition.
             os.remove(model_metadata_yaml_filepath)
@@ -230,14 +249,15 @@ def fixture_build_repo_for_testing_factory(
 
         deployment_yaml_filepath = next(dst_deployments_dir.glob("deployment.yaml"))
         with open(deployment_yaml_filepath, encoding="utf-8") as fd:
-            deployment_metadata = yaml.safe_load(fd)
+            deployment_metadata = yaml.load(fd, Loader=SafeLoader)
         DeploymentSchema.set_value(
             deployment_metadata,
             DeploymentSchema.MODEL_ID_KEY,
             value=models_meta[0].metadata[ModelSchema.MODEL_ID_KEY],
         )
         with open(deployment_yaml_filepath, "w", encoding="utf-8") as fd:
-            yaml.safe_dump(deployment_metadata, fd)
+            yaml.dump(deployment_metadata, fd, Dumper=SafeDumper)
+        return deployment_yaml_filepath
 
     def _save_multi_models_metadata_yaml_file(
         dst_deployments_dir, models_meta, is_absolute_model_path, model_path_prefix
@@ -258,7 +278,7 @@ def fixture_build_repo_for_testing_factory(
                 }
             )
         with open(dst_deployments_dir / "models.yaml", "w", encoding="utf-8") as fd:
-            yaml.safe_dump(multi_models_definition, fd)
+            yaml.dump(multi_models_definition, fd, Dumper=SafeDumper)
 
     def _inner(dedicated_model_definition, is_absolute_model_path=False, model_path_prefix=None):
         src_models_root_dir = Path(__file__).parent / ".." / "models"
@@ -277,7 +297,9 @@ def fixture_build_repo_for_testing_factory(
 
         src_deployments_dir = Path(__file__).parent / ".." / "deployments"
         dst_deployments_dir = workspace_path / src_deployments_dir.name
-        _setup_deployment(src_deployments_dir, dst_deployments_dir, models_meta)
+        deployment_yaml_filepath = _setup_deployment(
+            src_deployments_dir, dst_deployments_dir, models_meta
+        )
 
         if not dedicated_model_definition:
             _save_multi_models_metadata_yaml_file(
@@ -286,10 +308,11 @@ def fixture_build_repo_for_testing_factory(
 
         # 8. Add files to repo in multiple commits in order to avoid a use case of too few commits
         #    that can be regarded as not a merge branch
-        os.chdir(workspace_path)
         git_repo.git.add("--all")
         git_repo.git.commit("-m", "Initial commit", "--no-verify")
 
+        return deployment_yaml_filepath
+
     return _inner
 
 
@@ -298,10 +321,11 @@ def fixture_build_repo_for_testing(build_repo_for_testing_factory):
     """
     A fixture to build a complete source stree with model and deployment definitions in it. Each
     model has its own metadata definition in a dedicated YAML file. Then commit everything into
-    the repository that was initialized in that root dir.
+    the repository that was initialized in that root dir. The fixture returns the deployment's
+    yaml file path, so dependent fixtures do not need to search for it in the source tree.
     """
 
-    build_repo_for_testing_factory(dedicated_model_definition=True)
+    return build_repo_for_testing_factory(dedicated_model_definition=True)
 
 
 @pytest.fixture
@@ -402,26 +426,27 @@ def set_deployment_actuals_dataset(dr_client, deployment_metadata, deployment_me
 
 @contextlib.contextmanager
 def _temporarily_replace_schema(yaml_filepath, *keys, metadata_or_value):
+    yaml_filepath = Path(yaml_filepath)
     try:
-        origin_metadata = None
-        with open(yaml_filepath, encoding="utf-8") as fd:
-            origin_metadata = yaml.safe_load(fd)
+        origin_content = None
+        origin_content = yaml_filepath.read_text(encoding="utf-8")
 
         if keys:  # Assuming a value replacement
-            new_metadata = copy.deepcopy(origin_metadata)
+            # The original content is restored from its text, so there is no need to keep an
+            # untouched copy of the loaded metadata.
+            new_metadata = yaml.load(origin_content, Loader=SafeLoader)
             SharedSchema.set_value(new_metadata, *keys, value=metadata_or_value)
         else:  # Assuming a metadata replacement
             new_metadata = metadata_or_value
 
-        with open(yaml_filepath, "w", encoding="utf-8") as fd:
-            yaml.safe_dump(new_metadata, fd)
+        yaml_filepath.write_text(yaml.dump(new_metadata, Dumper=SafeDumper), encoding="utf-8")
 
         yield new_metadata
 
     finally:
-        if origin_metadata:
-            with open(yaml_filepath, "w", encoding="utf-8") as fd:
-                yaml.safe_dump(origin_metadata, fd)
+        # Restore the original content as is, without serializing the original metadata again
+        if origin_content:
+            yaml_filepath.write_text(origin_content, encoding="utf-8")
 
 
 @contextlib.contextmanager
@@ -449,13 +474,13 @@ def skip_model_testing(model_metadata, model_metadata_yaml_file):
     origin_test_section = model_metadata.get(ModelSchema.TEST_KEY)
     model_metadata.pop(ModelSchema.TEST_KEY, None)
     with open(model_metadata_yaml_file, "w", encoding="utf-8") as fd:
-        yaml.safe_dump(model_metadata, fd)
+        yaml.dump(model_metadata, fd, Dumper=SafeDumper)
 
     yield
 
     model_metadata[ModelSchema.TEST_KEY] = origin_test_section
     with open(model_metadata_yaml_file, "w", encoding="utf-8") as fd:
-        yaml.safe_dump(model_metadata, fd)
+        yaml.dump(model_metadata, fd, Dumper=SafeDumper)
 
 
 # NOTE: it was rather better to use the pytest.mark.usefixture for 'build_repo_for_testing'
@@ -473,7 +498,7 @@ def fixture_model_metadata(model_metadata_yaml_file):
     """A fixture to load and return model metadata from a given yaml definition."""
 
     with open(model_metadata_yaml_file, encoding="utf-8") as fd:
-        return yaml.safe_load(fd)
+        return yaml.load(fd, Loader=SafeLoader)
 
 
 @pytest.fixture(name="main_branch_name")
@@ -508,7 +533,7 @@ def increase_model_memory_by_1mb(model_yaml_file):
     """A method to increase a model's memory in a model definition and save it locally."""
 
     with open(model_yaml_file, encoding="utf-8") as fd:
-        yaml_content = yaml.safe_load(fd)
+        yaml_content = yaml.load(fd, Loader=SafeLoader)
         memory = ModelSchema.get_value(
             yaml_content, ModelSchema.VERSION_KEY, ModelSchema.MEMORY_KEY
         )
@@ -518,7 +543,7 @@ def increase_model_memory_by_1mb(model_yaml_file):
         yaml_content[ModelSchema.VERSION_KEY][ModelSchema.MEMORY_KEY] = new_memory
 
     with open(model_yaml_file, "w", encoding="utf-8") as fd:
-        yaml.safe_dump(yaml_content, fd)
+        yaml.dump(yaml_content, fd, Dumper=SafeDumper)
 
     return new_memory
 
@@ -556,38 +581,37 @@ def run_github_action(
 
     main_branch_head_sha = main_branch_head_sha or git_repo.head.commit.hexsha
     ref_name = main_branch_name if event_name == "push" else "merge-branch"
-    with github_env_set("GITHUB_WORKSPACE", str(workspace_path)), github_env_set(
-        "GITHUB_SHA", git_repo.commit(main_branch_head_sha).hexsha
-    ), github_env_set("GITHUB_EVENT_NAME", event_name), github_env_set(
-        "GITHUB_SHA", git_repo.commit(main_branch_head_sha).hexsha
-    ), github_env_set(
-        "GITHUB_BASE_REF", main_branch_name
-    ), github_env_set(
-        "GITHUB_REF_NAME", ref_name
+    github_env = {
+        "GITHUB_WORKSPACE": str(workspace_path),
+        "GITHUB_SHA": git_repo.commit(main_branch_head_sha).hexsha,
+        "GITHUB_EVENT_NAME": event_name,
+        "GITHUB_BASE_REF": main_branch_name,
+        "GITHUB_REF_NAME": ref_name,
+    }
+    datarobot_webserver = os.environ.get("DATAROBOT_WEBSERVER")
+    args = [
+        "--webserver",
+        datarobot_webserver,
+        "--api-token",
+        os.environ.get("DATAROBOT_API_TOKEN"),
+        "--branch",
+        main_branch_name,
+        "--allow-model-deletion",
+    ]
+
+    if not is_deploy:
+        args.append("--models-only")
+
+    if allow_deployment_deletion:
+        args.append("--allow-deployment-deletion")
+
+    if not any(
+        webserver_with_cert in datarobot_webserver
+        for webserver_with_cert in ["https://app.datarobot.com", "https://app.eu.datarobot.com"]
     ):
-        datarobot_webserver = os.environ.get("DATAROBOT_WEBSERVER")
-        args = [
-            "--webserver",
-            datarobot_webserver,
-            "--api-token",
-            os.environ.get("DATAROBOT_API_TOKEN"),
-            "--branch",
-            main_branch_name,
-            "--allow-model-deletion",
-        ]
-
-        if not is_deploy:
-            args.append("--models-only")
-
-        if allow_deployment_deletion:
-            args.append("--allow-deployment-deletion")
-
-        if not any(
-            webserver_with_cert in datarobot_webserver
-            for webserver_with_cert in ["https://app.datarobot.com", "https://app.eu.datarobot.com"]
-        ):
-            args.append("--skip-cert-verification")
+        args.append("--skip-cert-verification")
 
+    with patch.dict(os.environ, github_env):
         main(args)
 
 
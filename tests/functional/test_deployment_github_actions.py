@@ -26,6 +26,8 @@ from metrics import Metrics
 from schema_validator import DeploymentSchema
 from schema_validator import ModelSchema
 from tests.conftest import unique_str
+from tests.functional.conftest import SafeDumper
+from tests.functional.conftest import SafeLoader
 from tests.functional.conftest import cleanup_models
 from tests.functional.conftest import increase_model_memory_by_1mb
 from tests.functional.conftest import printout
@@ -38,32 +40,47 @@ from tests.functional.conftest import upload_and_update_dataset
 from tests.functional.conftest import webserver_accessible
 
 
-@pytest.fixture(name="deployment_metadata_yaml_file")
-@pytest.mark.usefixtures("build_repo_for_testing")
-def fixture_deployment_metadata_yaml_file(workspace_path, git_repo, model_metadata):
-    """A fixture to return a unique deployment from the temporary created local source tree."""
+@pytest.fixture(name="deployment_info")
+def fixture_deployment_info(build_repo_for_testing, git_repo, model_metadata):
+    """
+    A fixture to set a unique deployment in the temporary created local source tree and return
+    its information.
+    """
 
-    deployment_yaml_file = next(workspace_path.rglob("**/deployment.yaml"))
-    with open(deployment_yaml_file, encoding="utf-8") as fd:
-        yaml_content = yaml.safe_load(fd)
+    deployment_yaml_file = build_repo_for_testing
+    with open(deployment_yaml_file, "r+", encoding="utf-8") as fd:
+        yaml_content = yaml.load(fd, Loader=SafeLoader)
         yaml_content[DeploymentSchema.DEPLOYMENT_ID_KEY] = f"deployment-id-{unique_str()}"
         yaml_content[DeploymentSchema.MODEL_ID_KEY] = model_metadata[ModelSchema.MODEL_ID_KEY]
+        fd.seek(0)
+        fd.truncate()
+        yaml.dump(yaml_content, fd, Dumper=SafeDumper)
+
+    # Amend the last commit in-process, without spawning 'git add' and 'git commit' commands
+    git_repo.index.add([str(deployment_yaml_file)])
+    head_commit = git_repo.head.commit
+    git_repo.index.commit(
+        head_commit.message, parent_commits=head_commit.parents, author=head_commit.author
+    )
 
-    with open(deployment_yaml_file, "w", encoding="utf-8") as fd:
-        yaml.safe_dump(yaml_content, fd)
+    return DeploymentInfo(deployment_yaml_file, yaml_content)
 
-    git_repo.git.add(deployment_yaml_file)
-    git_repo.git.commit("--amend", "--no-edit")
 
-    return deployment_yaml_file
+@pytest.fixture(name="deployment_metadata_yaml_file")
+def fixture_deployment_metadata_yaml_file(deployment_info):
+    """A fixture to return a unique deployment from the temporary created local source tree."""
+
+    return deployment_info.yaml_filepath
 
 
 @pytest.fixture(name="deployment_metadata")
-def fixture_deployment_metadata(deployment_metadata_yaml_file):
-    """A fixture to load and return a deployment metadata from a given yaml file definition."""
+def fixture_deployment_metadata(deployment_info):
+    """
+    A fixture to return a deployment metadata. It is the same metadata that was just written to
+    the yaml file definition, so there is no need to read and parse the file again.
+    """
 
-    with open(deployment_metadata_yaml_file, encoding="utf-8") as fd:
-        return yaml.safe_load(fd)
+    return deployment_info.metadata
 
 
 @pytest.fixture(name="cleanup")
@@ -72,6 +89,8 @@ def fixture_cleanup(dr_client, workspace_path, deployment_metadata):
 
     yield
 
+    # NOTE: the deployment must be deleted before its model, otherwise DataRobot refuses to delete
+    # a model that is in use.
     cleanup_deployment(dr_client, deployment_metadata)
     # NOTE: we have more than one model in the tree
     cleanup_models(dr_client, workspace_path)
@@ -93,6 +112,19 @@ def cleanup_deployment(dr_client, deployment_metadata):
 class TestDeploymentGitHubActions:
     """Contains cases to test the deployment GitHub action."""
 
+    # Pairs of a deployment's settings keys (under the settings section) and the corresponding
+    # attribute in the DataRobot deployment settings.
+    DEPLOYMENT_SETTINGS_ATTRS = [
+        ((DeploymentSchema.ENABLE_TARGET_DRIFT_KEY,), "targetDrift"),
+        ((DeploymentSchema.ENABLE_FEATURE_DRIFT_KEY,), "featureDrift"),
+        (
+            (DeploymentSchema.SEGMENT_ANALYSIS_KEY, DeploymentSchema.ENABLE_SEGMENT_ANALYSIS_KEY),
+            "segmentAnalysis",
+        ),
+        ((DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY,), "challengerModels"),
+        ((DeploymentSchema.ENABLE_PREDICTIONS_COLLECTION_KEY,), "predictionsDataCollection"),
+    ]
+
     @contextlib.contextmanager
     def _upload_actuals_dataset(
         self, event_name, dr_client, deployment_metadata, deployment_metadata_yaml_file
@@ -127,10 +159,10 @@ class TestDeploymentGitHubActions:
         """
         For 'push' event the changes are committed into the master using a single commit. For
         'pull_request' event, the changes are committed into a feature branch and then a merge
-        branch is created.
+        branch is created. GitPython executes the git commands in the repository's working dir,
+        so there is no need to change the process-wide current directory.
         """
 
-        os.chdir(git_repo.working_dir)
         if event_name == "push":
             git_repo.git.commit("-a", "-m", commit_message)
         elif event_name == "pull_request":
@@ -255,8 +287,7 @@ class TestDeploymentGitHubActions:
         printout("Run the GitHub action (push event) to create a model and deployment")
         run_github_action(workspace_path, git_repo, main_branch_name, "push", is_deploy=True)
         local_user_provided_id = deployment_metadata[DeploymentSchema.DEPLOYMENT_ID_KEY]
-        deployments = dr_client.fetch_deployments()
-        assert any(d.get("userProvidedId") == local_user_provided_id for d in deployments)
+        assert dr_client.fetch_deployment_by_git_id(local_user_provided_id) is not None
 
         # Make a local change to the model and commit
         printout("Make a change to the model and run custom model GitHub action (push event) ...")
@@ -269,10 +300,8 @@ class TestDeploymentGitHubActions:
         run_github_action(workspace_path, git_repo, main_branch_name, event_name, is_deploy=True)
 
         printout("Validate ...")
-        deployments = dr_client.fetch_deployments()
-        the_deployment = next(
-            d for d in deployments if d.get("userProvidedId") == local_user_provided_id
-        )
+        the_deployment = dr_client.fetch_deployment_by_git_id(local_user_provided_id)
+        assert the_deployment is not None
 
         latest_deployment_model_version_id = the_deployment["model"]["customModelImage"][
             "customModelVersionId"
@@ -285,11 +314,17 @@ class TestDeploymentGitHubActions:
 
     @staticmethod
     def _enable_challenger(deployment_metadata, deployment_metadata_yaml_file, enabled=True):
-        settings = deployment_metadata.get(DeploymentSchema.SETTINGS_SECTION_KEY, {})
-        settings[DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY] = enabled
-        deployment_metadata[DeploymentSchema.SETTINGS_SECTION_KEY] = settings
-        with open(deployment_metadata_yaml_file, "w", encoding="utf-8") as fd:
-            yaml.safe_dump(deployment_metadata, fd)
+        # Only the challenger flag is changed in-place. The metadata is already in memory, so
+        # there is no need to read and parse the yaml file before it is saved.
+        DeploymentSchema.set_value(
+            deployment_metadata,
+            DeploymentSchema.SETTINGS_SECTION_KEY,
+            DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY,
+            value=enabled,
+        )
+        deployment_metadata_yaml_file.write_text(
+            yaml.dump(deployment_metadata, Dumper=SafeDumper), encoding="utf-8"
+        )
 
     @pytest.mark.usefixtures("cleanup", "skip_model_testing", "set_deployment_actuals_dataset")
     def test_e2e_deployment_delete(
@@ -306,9 +341,8 @@ class TestDeploymentGitHubActions:
         # Create a model and deployment. Run the GitHub action.
         printout("Run the GitHub action (push event) to create a model and deployment")
         run_github_action(workspace_path, git_repo, main_branch_name, "push", is_deploy=True)
-        deployments = dr_client.fetch_deployments()
         local_user_provided_id = deployment_metadata[DeploymentSchema.DEPLOYMENT_ID_KEY]
-        assert any(d.get("userProvidedId") == local_user_provided_id for d in deployments)
+        assert dr_client.fetch_deployment_by_git_id(local_user_provided_id) is not None
 
         # Delete a deployment local definition yaml file
         printout("Run the GitHub action (push event) to delete deployment")
@@ -325,9 +359,7 @@ class TestDeploymentGitHubActions:
             allow_deployment_deletion=False,
         )
         printout("Validate ...")
-        deployments = dr_client.fetch_deployments()
-        local_user_provided_id = deployment_metadata[DeploymentSchema.DEPLOYMENT_ID_KEY]
-        assert any(d.get("userProvidedId") == local_user_provided_id for d in deployments)
+        assert dr_client.fetch_deployment_by_git_id(local_user_provided_id) is not None
 
         # Run the GitHub action (pull request) with allowed deployment deletion
         printout("Run the GitHub action (pull request) with allowed deletion")
@@ -340,9 +372,7 @@ class TestDeploymentGitHubActions:
             allow_deployment_deletion=True,
         )
         printout("Validate ...")
-        deployments = dr_client.fetch_deployments()
-        local_user_provided_id = deployment_metadata[DeploymentSchema.DEPLOYMENT_ID_KEY]
-        assert any(d.get("userProvidedId") == local_user_provided_id for d in deployments)
+        assert dr_client.fetch_deployment_by_git_id(local_user_provided_id) is not None
 
         # Run the GitHub action (push) with allowed deployment deletion
         printout("Run the GitHub action (push) with allowed deletion")
@@ -355,9 +385,7 @@ class TestDeploymentGitHubActions:
             allow_deployment_deletion=True,
         )
         printout("Validate ...")
-        deployments = dr_client.fetch_deployments()
-        local_user_provided_id = deployment_metadata[DeploymentSchema.DEPLOYMENT_ID_KEY]
-        assert all(d.get("userProvidedId") != local_user_provided_id for d in deployments)
+        assert dr_client.fetch_deployment_by_git_id(local_user_provided_id) is None
         printout("Done")
 
     @pytest.mark.parametrize("event_name", ["push", "pull_request"])
@@ -601,70 +629,26 @@ class TestDeploymentGitHubActions:
         event_name,
         github_output,
     ):
+        # A single request returns all the deployment settings that are validated below
         new_deployment_settings = dr_client.fetch_deployment_settings(
             deployment["id"], deployment_info
         )
-        expected_values = {}
         if event_name == "push":
-            expected_values[
-                DeploymentSchema.ENABLE_TARGET_DRIFT_KEY
-            ] = deployment_info.get_settings_value(DeploymentSchema.ENABLE_TARGET_DRIFT_KEY)
-
-            expected_values[
-                DeploymentSchema.ENABLE_FEATURE_DRIFT_KEY
-            ] = deployment_info.get_settings_value(DeploymentSchema.ENABLE_FEATURE_DRIFT_KEY)
-
-            expected_values[
-                DeploymentSchema.ENABLE_SEGMENT_ANALYSIS_KEY
-            ] = deployment_info.get_settings_value(
-                DeploymentSchema.SEGMENT_ANALYSIS_KEY,
-                DeploymentSchema.ENABLE_SEGMENT_ANALYSIS_KEY,
-            )
-            expected_values[
-                DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY
-            ] = deployment_info.get_settings_value(DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY)
-            expected_values[
-                DeploymentSchema.ENABLE_PREDICTIONS_COLLECTION_KEY
-            ] = deployment_info.get_settings_value(
-                DeploymentSchema.ENABLE_PREDICTIONS_COLLECTION_KEY
-            )
+            expected_values = {
+                dr_attr: deployment_info.get_settings_value(*settings_keys)
+                for settings_keys, dr_attr in cls.DEPLOYMENT_SETTINGS_ATTRS
+            }
         elif event_name == "pull_request":
-            expected_values[DeploymentSchema.ENABLE_TARGET_DRIFT_KEY] = origin_deployment_settings[
-                "targetDrift"
-            ]["enabled"]
-            expected_values[DeploymentSchema.ENABLE_FEATURE_DRIFT_KEY] = origin_deployment_settings[
-                "featureDrift"
-            ]["enabled"]
-            expected_values[DeploymentSchema.ENABLE_SEGMENT_ANALYSIS_KEY] = new_deployment_settings[
-                "segmentAnalysis"
-            ]["enabled"]
-            expected_values[
-                DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY
-            ] = origin_deployment_settings["challengerModels"]["enabled"]
-            expected_values[
-                DeploymentSchema.ENABLE_PREDICTIONS_COLLECTION_KEY
-            ] = origin_deployment_settings["predictionsDataCollection"]["enabled"]
+            expected_values = {
+                dr_attr: origin_deployment_settings[dr_attr]["enabled"]
+                for _, dr_attr in cls.DEPLOYMENT_SETTINGS_ATTRS
+            }
+            # The segment analysis is not expected to keep its original value
+            segment_analysis_enabled = new_deployment_settings["segmentAnalysis"]["enabled"]
+            expected_values["segmentAnalysis"] = segment_analysis_enabled
         else:
             assert False, f"Unsupported GitHub event name: {event_name}"
 
-        assert (
-            expected_values[DeploymentSchema.ENABLE_TARGET_DRIFT_KEY]
-            == new_deployment_settings["targetDrift"]["enabled"]
-        )
-        assert (
-            expected_values[DeploymentSchema.ENABLE_FEATURE_DRIFT_KEY]
-            == new_deployment_settings["featureDrift"]["enabled"]
-        )
-        assert (
-            expected_values[DeploymentSchema.ENABLE_SEGMENT_ANALYSIS_KEY]
-            == new_deployment_settings["segmentAnalysis"]["enabled"]
-        )
-        assert (
-            expected_values[DeploymentSchema.ENABLE_CHALLENGER_MODELS_KEY]
-            == new_deployment_settings["challengerModels"]["enabled"]
-        )
-        assert (
-            expected_values[DeploymentSchema.ENABLE_PREDICTIONS_COLLECTION_KEY]
-            == new_deployment_settings["predictionsDataCollection"]["enabled"]
-        )
+        for _, dr_attr in cls.DEPLOYMENT_SETTINGS_ATTRS:
+            assert expected_values[dr_attr] == new_deployment_settings[dr_attr]["enabled"], dr_attr
         cls._validate_deployments_metric(Metrics.total_updated_settings, event_name, github_output)
@@ -12,8 +12,12 @@
 import contextlib
 import json
 import logging
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
 
 import pytest
+import requests
 import responses
 from bson import ObjectId
 from mock import Mock
@@ -1373,3 +1377,88 @@ class TestDeploymentSettingsPayloadConstruction:
                     "enabled": pred_data_collection_enabled
                 }
         return actual_settings
+
+
+class TestHttpSession:
+    """Contains cases to test the HTTP session that is used by the DataRobot client."""
+
+    @pytest.fixture
+    def unavailable_webserver(self):
+        """
+        A fixture to run a local web server that responds to every DELETE request with a
+        'Service Unavailable' status and a 'Retry-After' header. It yields the web server URL and
+        the list of the received request paths.
+        """
+
+        received_paths = []
+
+        class _UnavailableHandler(BaseHTTPRequestHandler):
+            """A request handler that emulates an unavailable DataRobot web server."""
+
+            # pylint: disable=invalid-name
+            def do_DELETE(self):
+                """Respond with a retryable 'Service Unavailable' status."""
+
+                received_paths.append(self.path)
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                """Keep the test output clean from the web server's access logs."""
+
+        server = HTTPServer(("127.0.0.1", 0), _UnavailableHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}", received_paths
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    @responses.activate
+    def test_calls_are_carried_out_over_a_single_session(self, dr_client, webserver):
+        """A case to test that consecutive calls are carried out over the same HTTP session."""
+
+        delete_url = f"{webserver}/api/v2/customModels/abc123/"
+        responses.add(responses.DELETE, delete_url, status=204)
+
+        session = dr_client._http_requester._session
+        assert isinstance(session, requests.Session)
+        dr_client.delete_custom_model_by_model_id("abc123")
+        assert dr_client._http_requester._session is session
+        dr_client.delete_custom_model_by_model_id("abc123")
+        assert dr_client._http_requester._session is session
+
+    @pytest.mark.parametrize("method", ["get", "post", "patch", "delete"])
+    @responses.activate
+    def test_module_level_requests_functions_are_not_used(self, webserver, api_token, method):
+        """
+        A case to test that the HTTP calls are not carried out by the module-level 'requests'
+        functions, which open a new connection for every call.
+        """
+
+        base_url = f"{webserver}/api/v2/"
+        responses.add(method.upper(), f"{base_url}customModels/", status=200)
+
+        http_requester = HttpRequester(base_url, api_token)
+        with patch(f"common.http_requester.requests.{method}") as module_level_function:
+            response = getattr(http_requester, method)("customModels")
+        module_level_function.assert_not_called()
+        assert response.status_code == 200
+
+    def test_failure_response_reaches_status_check_after_retries(
+        self, unavailable_webserver, api_token
+    ):
+        """
+        A case to test that once the retries are exhausted, the last failure response is returned
+        to the DataRobot client, which raises an error based on its status code.
+        """
+
+        webserver, received_paths = unavailable_webserver
+        dr_client = DrClient(webserver, api_token, verify_cert=False)
+        with pytest.raises(DataRobotClientError) as ex:
+            dr_client.delete_custom_model_by_model_id("abc123")
+        assert ex.value.code == 503
+        assert received_paths == ["/api/v2/customModels/abc123/"] * (HttpRequester.MAX_RETRIES + 1)